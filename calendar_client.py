@@ -1,11 +1,40 @@
 """Module to get today's events from an iCal URL.
 """
+import asyncio
 from datetime import datetime, timedelta
-import json
+from functools import lru_cache
+from operator import attrgetter
+from typing import NamedTuple, Optional
+import aiohttp
 from icalendar import Calendar
+import orjson
 import requests
 
-def get_days_events(url: str, req_date: datetime=datetime.now()) -> list[dict]:
+class Event(NamedTuple):
+    """An event from an iCal file"""
+    name: Optional[str]
+    dtstart: str
+    start_time: str
+    dtend: str
+    end_time: str
+    description: Optional[str]
+    location: Optional[str]
+    summary: Optional[str]
+
+@lru_cache(maxsize=16)
+def _load_calendar(url: str) -> Calendar:
+    """Download and parse an iCal URL, once per process
+
+    Args:
+        url (str): The URL of the iCal file
+
+    Returns:
+        Calendar: The parsed calendar
+    """
+    response = requests.get(url, timeout=10)
+    return Calendar.from_ical(response.text)
+
+def get_days_events(url: str, req_date: Optional[datetime] = None) -> list[Event]:
     """Get the events for a specific date from an iCal URL
 
     Args:
@@ -13,10 +42,58 @@ def get_days_events(url: str, req_date: datetime=datetime.now()) -> list[dict]:
         req_date (datetime, optional): The date to get the events for. Defaults to datetime.now().
 
     Returns:
-        list[dict]: List of events for the specified date
+        list[Event]: List of events for the specified date
+    """
+    req_date = req_date or datetime.now()
+    return _get_calendar_events(_load_calendar(url), req_date)
+
+async def fetch_ics(session: aiohttp.ClientSession, url: str) -> str:
+    """Download the contents of an iCal URL
+
+    Args:
+        session (aiohttp.ClientSession): Session to issue the request with
+        url (str): The URL of the iCal file
+
+    Returns:
+        str: The iCal file contents
+    """
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+        return await response.text()
+
+async def gather_all(urls: list[str]) -> list[str]:
+    """Download several iCal URLs concurrently
+
+    Args:
+        urls (list[str]): The URLs of the iCal files
+
+    Returns:
+        list[str]: The iCal file contents, in the same order as urls
+    """
+    async with aiohttp.ClientSession() as session:
+        return await asyncio.gather(*[fetch_ics(session, url) for url in urls])
+
+def parse_ics(text: str, req_date: datetime) -> list[Event]:
+    """Get the events for a specific date from the contents of an iCal file
+
+    Args:
+        text (str): The iCal file contents
+        req_date (datetime): The date to get the events for
+
+    Returns:
+        list[Event]: List of events for the specified date
+    """
+    return _get_calendar_events(Calendar.from_ical(text), req_date)
+
+def _get_calendar_events(calendar: Calendar, req_date: datetime) -> list[Event]:
+    """Get the events for a specific date from a parsed calendar
+
+    Args:
+        calendar (Calendar): The parsed calendar
+        req_date (datetime): The date to get the events for
+
+    Returns:
+        list[Event]: List of events for the specified date
     """
-    response = requests.get(url, timeout=10)
-    calendar = Calendar.from_ical(response.text)
     today = req_date.date()
     events = []
 
@@ -24,61 +101,63 @@ def get_days_events(url: str, req_date: datetime=datetime.now()) -> list[dict]:
         start = event.get("dtstart").dt
         end = event.get("dtend").dt
 
-        # Ensure the start and end dates are datetime.date objects
-        if isinstance(start, datetime):
-            start_time = start.time()
-        else:
+        # Skip events not covering the day before doing any conversion
+        start_date = start.date() if isinstance(start, datetime) else start
+        end_date = end.date() if isinstance(end, datetime) else end
+        if not start_date <= today <= end_date:
+            continue
+
+        # Ensure the start and end dates are datetime.datetime objects
+        if not isinstance(start, datetime):
             start = datetime.combine(start, datetime.min.time())
-            start_time = start.time()
 
-        if isinstance(end, datetime):
-            end_time = end.time()
-        else:
+        if not isinstance(end, datetime):
             end = datetime.combine(end, datetime.min.time())
-            end_time = end.time()
-
-        if start.date() <= today <= end.date():
-            event_info = {
-                "name": event.get("name"),
-                "dtstart": start.isoformat(),
-                "start_time": start_time.strftime("%H:%M"),
-                "dtend": end.isoformat(),
-                "end_time": end_time.strftime("%H:%M"),
-                "description": event.get("description"),
-                "location": event.get("location"),
-                "summary": event.get("summary")
-            }
-            events.append(event_info)
-
-    # Sort events in descending order by start date and time
-    events.sort(key=lambda x: (x["dtstart"], x["dtend"]), reverse=False)
+
+        event_info = Event(
+            name=event.get("name"),
+            dtstart=start.isoformat(),
+            start_time=f"{start.hour:02d}:{start.minute:02d}",
+            dtend=end.isoformat(),
+            end_time=f"{end.hour:02d}:{end.minute:02d}",
+            description=event.get("description"),
+            location=event.get("location"),
+            summary=event.get("summary")
+        )
+        events.append(event_info)
+
+    # Sort events in ascending order by start and end date and time
+    events.sort(key=attrgetter("dtstart", "dtend"))
     return events
 
-def get_event_strings(events: list[dict]) -> list[str]:
-    """Get the event strings from the events dictionary
+def get_event_strings(events: list[Event]) -> list[str]:
+    """Get the event strings from the events
 
     Args:
-        events (list[dict]): List of events
+        events (list[Event]): List of events
 
     Returns:
         list[str]: List of event strings
     """
     event_strings = []
     for event in events:
-        event_str = ""
-        event_str += f"{event['summary']}, " if event.get("summary") else ""
-        event_str += f"a {event['description']} " if event.get("description") else ""
-        if event.get("dtstart"):
-            event_str += f"from {event['start_time']} to {event['end_time']} "
-        event_str += f"at {event['location']} " if event.get("location") else ""
-        event_strings.append(event_str)
+        parts = []
+        if event.summary:
+            parts.append(f"{event.summary}, ")
+        if event.description:
+            parts.append(f"a {event.description} ")
+        if event.dtstart:
+            parts.append(f"from {event.start_time} to {event.end_time} ")
+        if event.location:
+            parts.append(f"at {event.location} ")
+        event_strings.append("".join(parts))
     return event_strings
 
 def main() -> None:
     """Main function to get today's events from the iCal URLs
     """
-    with open(".config.json", encoding="utf-8") as f:
-        config = json.load(f)
+    with open(".config.json", "rb") as f:
+        config = orjson.loads(f.read())
         urls = config["CALENDAR_URLS"]
         print("Events for today:")
         print("---------------")
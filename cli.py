@@ -1,10 +1,13 @@
 """Command line interface for the Notion fuzzy search
 """
-import json
+import asyncio
+from datetime import datetime
 import argparse
+import sys
+import orjson
 from notion_db_client import NotionClient
-from fuzzy_search import fuzzy_search
-from calendar_client import get_days_events, get_event_strings
+from fuzzy_search import fuzzy_search, fuzzy_search_many, preprocess_choices
+from calendar_client import gather_all, get_event_strings, parse_ics
 
 def print_results(results: list[tuple]) -> None:
     """Print the results of the fuzzy search in a nice, colored format
@@ -46,23 +49,40 @@ def main() -> None:
     """
     parser = argparse.ArgumentParser(description="Search for items in the Notion database")
     # optional argument query, can be --query or -q
-    parser.add_argument("--query", "-q", type=str, help="Query to search for")
+    parser.add_argument("--query", "-q", type=str, action="append",
+                        help="Query to search for, can be given multiple times")
     parser.add_argument("--config", type=str, default=".config.json",
                         help="Path to the config file")
     parser.add_argument("--k", type=int, default=3, help="Number of results to return")
     parser.add_argument("--today", action="store_true", help="Get the items due today")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore the cached search items and class names and fetch them again")
+    parser.add_argument("--repl", action="store_true",
+                        help="Keep reading queries from stdin, one per line")
 
     args = parser.parse_args()
 
-    with open(args.config, encoding="utf-8") as f:
-        config_items = json.load(f)
+    with open(args.config, "rb") as f:
+        config_items = orjson.loads(f.read())
 
-    client = NotionClient(config_items["NOTION_API_KEY"], config_items["NOTION_DATABASE_ID"])
+    client = NotionClient(config_items["NOTION_API_KEY"], config_items["NOTION_DATABASE_ID"],
+                          config_items.get("NOTION_CLASSES_DATABASE_ID"))
+    if args.refresh:
+        client.clear_name_cache()
 
-    if args.query:
-        choices = client.get_page_strings(client.get_recent())
-        search_results = fuzzy_search(args.query, choices, args.k)
-        print_results(search_results)
+    if args.query or args.repl:
+        choices = client.get_recent_strings(refresh=args.refresh)
+        processed_choices = preprocess_choices(choices)
+        if args.query:
+            for search_results in fuzzy_search_many(args.query, choices, args.k,
+                                                    processed_choices):
+                print_results(search_results)
+        if args.repl:
+            # The choices stay in memory, so each query only runs the fuzzy search
+            for line in sys.stdin:
+                query = line.strip()
+                if query:
+                    print_results(fuzzy_search(query, choices, args.k, processed_choices))
 
     if args.today:
         tasks = client.get_today()
@@ -70,9 +90,11 @@ def main() -> None:
         print_today_tasks(task_strings)
 
         calendar_urls = config_items["CALENDAR_URLS"]
+        calendar_texts = asyncio.run(gather_all(calendar_urls))
+        now = datetime.now()
         all_event_strings = []
-        for url in calendar_urls:
-            today_events = get_days_events(url)
+        for text in calendar_texts:
+            today_events = parse_ics(text, now)
             today_event_strings = get_event_strings(today_events)
             all_event_strings.extend(today_event_strings)
         print_today_events(all_event_strings)
@@ -1,20 +1,86 @@
 """Module to perform fuzzy search on the database items
 """
-from fuzzywuzzy import process
+from functools import lru_cache
+from typing import Optional
+import numpy as np
+from rapidfuzz import process, fuzz, utils
 
-def fuzzy_search(query: str, choices: list[str], k=3) -> list[tuple]:
+def preprocess_choices(choices: list[str]) -> list[str]:
+    """Normalize the choices once so repeated searches can skip it
+
+    Args:
+        choices (list[str]): List of the page names to search through
+
+    Returns:
+        list[str]: Lowercased choices with punctuation stripped
+    """
+    return [utils.default_process(choice) for choice in choices]
+
+def fuzzy_search_many(queries: list[str], choices: list[str], k=3,
+                      processed_choices: Optional[list[str]] = None) -> list[list[tuple]]:
+    """Perform a fuzzy search for several queries at once to find the top k results of each
+
+    Args:
+        queries (list[str]): The query names to search for
+        choices (list[str]): List of the page names to search through
+        k (int, optional): Number of results to return per query. Defaults to 3.
+        processed_choices (list[str], optional): Output of preprocess_choices for choices.
+            Computed on the fly if not given.
+
+    Returns:
+        list[list[tuple]]: List of the top k results for each query
+    """
+    k = min(k, len(choices))
+    if k <= 0:
+        return [[] for _ in queries]
+
+    if processed_choices is None:
+        processed_choices = preprocess_choices(choices)
+    processed_queries = [utils.default_process(query) for query in queries]
+
+    # Score every query against every choice in a single native call
+    scores = process.cdist(processed_queries, processed_choices, scorer=fuzz.WRatio,
+                           processor=None, workers=-1, dtype=np.float64)
+    # A stable sort on the negated scores breaks ties by position like process.extract
+    top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+    results = []
+    for row, indices in zip(scores, top):
+        results.append([(choices[i], float(row[i]), int(i)) for i in indices])
+    return results
+
+def fuzzy_search(query: str, choices: list[str], k=3,
+                 processed_choices: Optional[list[str]] = None) -> list[tuple]:
     """Perform a fuzzy search on the database items to find the top k results
 
     Args:
         query (str): The query name to search for
         choices (list[str]): List of the page names to search through
         k (int, optional): Number of results to return. Defaults to 3.
+        processed_choices (list[str], optional): Output of preprocess_choices for choices.
+            Computed on the fly if not given.
 
     Returns:
         list[tuple]: List of the top k results
     """
-    results = process.extract(query, choices, limit=k)
-    return results
+    processed = tuple(processed_choices) if processed_choices is not None else None
+    return list(_cached_fuzzy_search(query, tuple(choices), k, processed))
+
+@lru_cache(maxsize=256)
+def _cached_fuzzy_search(query: str, choices: tuple[str, ...], k: int,
+                         processed_choices: Optional[tuple[str, ...]]) -> tuple[tuple, ...]:
+    """Memoized fuzzy_search, taking tuples since lists can't be hashed
+
+    Args:
+        query (str): The query name to search for
+        choices (tuple[str, ...]): The page names to search through
+        k (int): Number of results to return
+        processed_choices (tuple[str, ...], optional): Output of preprocess_choices for choices
+
+    Returns:
+        tuple[tuple, ...]: The top k results
+    """
+    return tuple(fuzzy_search_many([query], choices, k, processed_choices)[0])
 
 def main():
     """Main function to test the fuzzy search
@@ -1,35 +1,172 @@
 """Module to interact with Notion API."""
+import asyncio
 from datetime import datetime, timedelta
 import logging
-from typing import List, Optional, Dict, Any
+import os
+import sqlite3
+import time
+from typing import List, Optional, Dict, Any, Tuple
+import aiohttp
+import ciso8601
+import orjson
 import requests
 from notion_client import Client
 
 logging.basicConfig(level=logging.WARNING)
 
+CACHE_PATH = os.path.expanduser("~/.cache/notion-cli.sqlite")
+# Seconds for which the cached page strings are reused
+STRINGS_TTL = 5 * 60
+# Seconds for which a cached class name is trusted without fetching it again
+NAMES_TTL = 24 * 60 * 60
+
 class NotionClient:
     """Class to create a NotionClient object to interact with the Notion API."""
 
-    def __init__(self, notion_api_key: str, notion_database_id: str) -> None:
+    def __init__(self, notion_api_key: str, notion_database_id: str,
+                 classes_database_id: Optional[str] = None,
+                 cache_path: Optional[str] = CACHE_PATH) -> None:
         """
         Constructor for the NotionClient class.
 
         Args:
             notion_api_key (str): API key for the Notion API
             notion_database_id (str): ID of the database to interact with
+            classes_database_id (Optional[str], optional): ID of the database holding the
+                class pages, used to resolve class names in one query. Defaults to None.
+            cache_path (Optional[str], optional): Path of the SQLite file caching class names
+                between runs, or None to disable it. The page strings are cached in a JSON
+                file next to it. Defaults to CACHE_PATH.
         """
         self.api_key: str = notion_api_key
         self.database_id: str = notion_database_id
+        self.classes_database_id: Optional[str] = classes_database_id
         self.headers: Dict[str, str] = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"
         }
         self.database = Client(auth=self.api_key)
+        # Reuse one connection pool rather than a new TLS handshake per request
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # Many rows share the same class, so remember the names already resolved
+        self._name_cache: Dict[str, str] = {}
+        # last_edited_time of the class pages behind the names, to spot stale ones
+        self._name_updated: Dict[str, Optional[str]] = {}
+        self._classes_loaded: bool = False
+        self._db: Optional[sqlite3.Connection] = (
+            self._open_cache(cache_path) if cache_path else None
+        )
+        self._strings_path: Optional[str] = (
+            f"{os.path.splitext(cache_path)[0]}.strings.json" if cache_path else None
+        )
+
+    def _open_cache(self, cache_path: str) -> Optional[sqlite3.Connection]:
+        """
+        Open the SQLite cache and load the class names it holds that were fetched less
+        than NAMES_TTL ago.
+
+        Args:
+            cache_path (str): Path of the SQLite file
+
+        Returns:
+            Optional[sqlite3.Connection]: Connection to the cache or None if it can't be opened
+        """
+        try:
+            cache_dir = os.path.dirname(cache_path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            db = sqlite3.connect(cache_path)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS names("
+                "id TEXT PRIMARY KEY, name TEXT, updated TEXT, fetched REAL)"
+            )
+            columns = [row[1] for row in db.execute("PRAGMA table_info(names)")]
+            if "fetched" not in columns:
+                # Caches written before the fetched column existed count as expired
+                db.execute("ALTER TABLE names ADD COLUMN fetched REAL")
+            # Expired names are resolved again, so renamed classes get picked up
+            rows = db.execute("SELECT id, name, updated FROM names WHERE fetched > ?",
+                              (time.time() - NAMES_TTL,))
+            for page_id, name, updated in rows:
+                self._name_cache[page_id] = name
+                self._name_updated[page_id] = updated
+            return db
+        except (OSError, sqlite3.Error) as e:
+            logging.warning("Class name cache unavailable: {%s}", e)
+            return None
+
+    def _remember_name(self, page_id: str, name: str, updated: Optional[str]) -> None:
+        """
+        Store a resolved class name in memory and in the SQLite cache.
+
+        Args:
+            page_id (str): ID of the class page
+            name (str): Name of the class
+            updated (Optional[str]): last_edited_time of the class page
+        """
+        self._name_cache[page_id] = name
+        self._name_updated[page_id] = updated
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO names(id, name, updated, fetched) VALUES (?, ?, ?, ?)",
+                (page_id, name, updated, time.time())
+            )
+        except sqlite3.Error as e:
+            logging.warning("Error caching class name for ID {%s}: %s", page_id, e)
+
+    def clear_name_cache(self) -> None:
+        """
+        Forget all the class names resolved so far, including the ones in the SQLite cache.
+        """
+        self._name_cache.clear()
+        self._name_updated.clear()
+        self._classes_loaded = False
+        if self._db is None:
+            return
+        try:
+            self._db.execute("DELETE FROM names")
+            self._db.commit()
+        except sqlite3.Error as e:
+            logging.warning("Error clearing class name cache: {%s}", e)
+
+    def _commit_cache(self) -> None:
+        """
+        Write the pending class names to the SQLite cache.
+        """
+        if self._db is None:
+            return
+        try:
+            self._db.commit()
+        except sqlite3.Error as e:
+            logging.warning("Error saving class name cache: {%s}", e)
+
+    def _read_class_name(self, page_id: str, page: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the class name out of a class page and remember it.
+
+        Args:
+            page_id (str): ID of the class page
+            page (Dict[str, Any]): JSON data of the class page
+
+        Returns:
+            Optional[str]: Name of the class or None if the page has no name
+        """
+        try:
+            page_name = page["properties"]["Class"]["title"][0]["plain_text"]
+        except (KeyError, IndexError) as e:
+            logging.error("Error reading page name for ID {%s}: %s", page_id, e)
+            return None
+        self._remember_name(page_id, page_name, page.get("last_edited_time"))
+        return page_name
 
     def get_name_from_id(self, page_id: str) -> Optional[str]:
         """
-        Get the name of the page from the page ID.
+        Get the name of the page from the page ID. get_page_strings resolves names in
+        bulk, this is kept for looking up a single page.
 
         Args:
             page_id (str): ID of the page to retrieve
@@ -37,16 +174,108 @@ class NotionClient:
         Returns:
             Optional[str]: Name of the page or None if an error occurs
         """
+        if page_id in self._name_cache:
+            return self._name_cache[page_id]
         url = f"https://api.notion.com/v1/pages/{page_id}"
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            json_data = response.json()
-            page_name = json_data["properties"]["Class"]["title"][0]["plain_text"]
-            return page_name
-        except requests.RequestException as e:
-            logging.error("Error fetching page name for ID {%s}: %s",page_id, e)
+            json_data = orjson.loads(response.content)
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
+            logging.error("Error fetching page name for ID {%s}: %s", page_id, e)
+            return None
+        page_name = self._read_class_name(page_id, json_data)
+        self._commit_cache()
+        return page_name
+
+    async def _fetch_name(self, session: aiohttp.ClientSession, page_id: str) -> Optional[str]:
+        """
+        Asynchronously get the name of the page from the page ID.
+
+        Args:
+            session (aiohttp.ClientSession): Session to issue the request with
+            page_id (str): ID of the page to retrieve
+
+        Returns:
+            Optional[str]: Name of the page or None if an error occurs
+        """
+        if page_id in self._name_cache:
+            return self._name_cache[page_id]
+        url = f"https://api.notion.com/v1/pages/{page_id}"
+        try:
+            async with session.get(url, headers=self.headers,
+                                   timeout=aiohttp.ClientTimeout(total=10)) as response:
+                response.raise_for_status()
+                json_data = orjson.loads(await response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
+            logging.error("Error fetching page name for ID {%s}: %s", page_id, e)
             return None
+        return self._read_class_name(page_id, json_data)
+
+    async def _fetch_names(self, page_ids: List[str]) -> List[Optional[str]]:
+        """
+        Get the names of several pages concurrently.
+
+        Args:
+            page_ids (List[str]): IDs of the pages to retrieve
+
+        Returns:
+            List[Optional[str]]: Names of the pages, in the same order as page_ids
+        """
+        connector = aiohttp.TCPConnector(limit=10)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            return await asyncio.gather(*[self._fetch_name(session, page_id)
+                                          for page_id in page_ids])
+
+    def _query_pages(self, query: Dict[str, Any],
+                     limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Query a database, following the cursor past Notion's 100 items per request.
+
+        Args:
+            query (Dict[str, Any]): Arguments for the databases.query endpoint
+            limit (Optional[int], optional): Maximum number of items to retrieve.
+                Defaults to None, which retrieves all of them.
+
+        Returns:
+            List[Dict[str, Any]]: Results of all the pages of the query
+        """
+        results: List[Dict[str, Any]] = []
+        cursor: Optional[str] = None
+        while limit is None or len(results) < limit:
+            page_size = 100 if limit is None else min(100, limit - len(results))
+            kwargs = {**query, "page_size": page_size}
+            if cursor:
+                kwargs["start_cursor"] = cursor
+            response = self.database.databases.query(**kwargs)
+            results.extend(response.get("results", []))
+            if not response.get("has_more"):
+                break
+            cursor = response.get("next_cursor")
+        return results
+
+    def _load_class_names(self) -> None:
+        """
+        Resolve all the class names with a single query on the classes database, replacing
+        the cached ones whose class page was edited since.
+        """
+        self._classes_loaded = True
+        try:
+            # Pages can't be filtered by ID, but the classes database is small
+            pages = self._query_pages({"database_id": self.classes_database_id})
+        except Exception as e:
+            logging.error("Error fetching class names: {%s}", e)
+            return
+
+        for page in pages:
+            page_id = page["id"]
+            cached_updated = self._name_updated.get(page_id)
+            # Notion timestamps share one ISO 8601 format, so they compare as strings
+            if (page_id in self._name_cache and cached_updated
+                    and page.get("last_edited_time", "") <= cached_updated):
+                continue
+            self._read_class_name(page_id, page)
+        self._commit_cache()
 
     def get_recent(self, num_items: int = 100) -> Optional[List[Dict[str, Any]]]:
         """
@@ -60,24 +289,73 @@ class NotionClient:
             an error occurs
         """
         try:
-            response = self.database.databases.query(
-                **{
+            return self._query_pages(
+                {
                     "database_id": self.database_id,
-                    "page_size": num_items,
                     "filter": {
                         "property": "Complete",
                         "checkbox": {
                             "equals": False
                         }
                     }
-                }
+                },
+                limit=num_items
             )
-
-            return response.get("results")
         except Exception as e:
             logging.error("Error fetching recent items: {%s}", e)
             return None
 
+    def _read_strings_cache(self) -> Dict[str, Any]:
+        """
+        Read the cached page strings file.
+
+        Returns:
+            Dict[str, Any]: Cached entries, keyed by query
+        """
+        try:
+            with open(self._strings_path, "rb") as f:
+                return orjson.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    def get_recent_strings(self, num_items: int = 100, refresh: bool = False) -> List[str]:
+        """
+        Get the page strings of the most recent items, reusing the ones cached by a
+        previous run if they are recent enough.
+
+        Args:
+            num_items (int, optional): Number of items to retrieve. Defaults to 100.
+            refresh (bool, optional): Ignore the cached strings. Defaults to False.
+
+        Returns:
+            List[str]: List of the page names
+        """
+        if self._strings_path is None:
+            return self.get_page_strings(self.get_recent(num_items))
+
+        key = f"{self.database_id}:recent:{num_items}"
+        cache = self._read_strings_cache()
+        entry = cache.get(key)
+        if not refresh and entry and time.time() - entry["ts"] < STRINGS_TTL:
+            return entry["strings"]
+
+        json_data = self.get_recent(num_items)
+        page_strings, complete = self._build_page_strings(json_data)
+        if json_data is None:
+            return page_strings
+        if not complete:
+            # A failed class lookup is likely transient, don't serve the gap for STRINGS_TTL
+            logging.warning("Some class names couldn't be fetched, not caching page strings")
+            return page_strings
+
+        cache[key] = {"ts": time.time(), "strings": page_strings}
+        try:
+            with open(self._strings_path, "wb") as f:
+                f.write(orjson.dumps(cache))
+        except OSError as e:
+            logging.warning("Error saving page strings cache: {%s}", e)
+        return page_strings
+
     def get_today(self) -> Optional[List[Dict[str, Any]]]:
         """
         Get the items due today or before.
@@ -90,8 +368,8 @@ class NotionClient:
         tomorrow = today + timedelta(days=1)
         tomorrow_iso = tomorrow.date().isoformat()
         try:
-            response = self.database.databases.query(
-                **{
+            return self._query_pages(
+                {
                     "database_id": self.database_id,
                     "sorts": [
                         {
@@ -117,7 +395,6 @@ class NotionClient:
                     }
                 }
             )
-            return response.get("results")
         except Exception as e:
             logging.error("Error fetching today's items: {%s}", e)
             return None
@@ -132,24 +409,8 @@ class NotionClient:
         Returns:
             datetime: Datetime object
         """
-        # Remove the timezone part if it exists
-        if date_str.endswith('Z'):
-            date_str = date_str[:-1]
-        elif '+' in date_str:
-            date_str = date_str.split('+')[0]
-        elif '-' in date_str and date_str.count('-') > 2:  # Handles timezone offsets like -04:00
-            date_str = date_str.rsplit('-', 1)[0]
-
-        try:
-            # Try to parse with fractional seconds
-            return datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%S.%f")
-        except ValueError:
-            try:
-                # Try to parse without fractional seconds
-                return datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%S")
-            except ValueError:
-                # If it fails, parse without time component
-                return datetime.strptime(date_str, "%Y-%m-%d")
+        # Keep the wall-clock time and drop any timezone offset
+        return ciso8601.parse_datetime_as_naive(date_str)
 
     def get_page_strings(self, json_data: Optional[List[Dict[str, Any]]]) -> List[str]:
         """
@@ -161,22 +422,56 @@ class NotionClient:
         Returns:
             List[str]: List of the page names
         """
+        return self._build_page_strings(json_data)[0]
+
+    def _build_page_strings(self,
+                            json_data: Optional[List[Dict[str, Any]]]) -> Tuple[List[str], bool]:
+        """
+        Get the page names from the JSON data, and whether every class name was resolved.
+
+        Args:
+            json_data (Optional[List[Dict[str, Any]]]): JSON data from the API response
+
+        Returns:
+            Tuple[List[str], bool]: List of the page names and False if some pages were
+            dropped because their class name couldn't be fetched
+        """
         if not json_data:
-            return []
+            return [], True
 
-        page_strings = []
+        rows = []
         for item in json_data:
             try:
-                page_name = item["properties"]["Name"]["title"][0]["plain_text"]
-                page_date = self._parse_date(item["properties"]["Date"]["date"]["start"])
-                page_type = item["properties"]["Type"]["select"]["name"]
-                class_id = item["properties"]["Class"]["relation"][0]["id"]
-                class_name = self.get_name_from_id(class_id)
-                if class_name:
-                    page_string = f"{page_name}, a {page_type} for {class_name} due on {page_date}"
-                    page_strings.append(page_string)
-            except KeyError as e:
+                props = item["properties"]
+                page_name = props["Name"]["title"][0]["plain_text"]
+                page_date = self._parse_date(props["Date"]["date"]["start"])
+                page_type = props["Type"]["select"]["name"]
+                class_id = props["Class"]["relation"][0]["id"]
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                # Missing fields, an empty title or relation, a null date or a bad date string
                 logging.error("Error processing item: {%s}", e)
                 continue
+            rows.append((page_name, page_date, page_type, class_id))
 
-        return page_strings
+        # Resolve each unseen class once, concurrently instead of one request at a time
+        class_ids = list(dict.fromkeys(row[3] for row in rows))
+        # The classes query is a single request and also refreshes renamed classes
+        if self.classes_database_id and not self._classes_loaded:
+            self._load_class_names()
+        # Fall back to fetching the leftover class pages individually
+        missing_ids = [class_id for class_id in class_ids if class_id not in self._name_cache]
+        if missing_ids:
+            asyncio.run(self._fetch_names(missing_ids))
+            self._commit_cache()
+
+        page_strings = []
+        complete = True
+        for page_name, page_date, page_type, class_id in rows:
+            class_name = self._name_cache.get(class_id)
+            if class_name:
+                page_string = f"{page_name}, a {page_type} for {class_name} due on {page_date}"
+                page_strings.append(page_string)
+            else:
+                complete = False
+
+        return page_strings, complete